@@ -1,27 +1,30 @@
+import logging
 import socket
+import select
+import zlib
 import sys
 import udt
 import packet
-import timer as t
 import time
+from time import monotonic
+
+log = logging.getLogger(__name__)
 
 
 def create_checksum(seq, data):
-    """Create a checksum for the given data by counting '1' bits.
+    """Create a CRC-32 checksum for the given data.
 
     Args:
         seq: Sequence number
-        data: Data to create checksum for (string or bytes)
+        data: Data to create checksum for (string or bytes-like)
 
     Returns:
         bytes: 8-byte checksum
     """
     # Convert data to bytes if needed
     data_bytes = data.encode('utf-8') if isinstance(data, str) else data
-    bit_sum = sum(bin(byte).count('1') for byte in data_bytes)
-    # Ensure checksum is exactly 8 bytes
-    checksum = str(bit_sum).zfill(8).encode('utf-8')
-    return checksum
+    # Zero-pad the 4-byte CRC so the checksum is exactly 8 bytes
+    return zlib.crc32(data_bytes).to_bytes(8, 'big')
 
 
 def verify_checksum(seq, checksum, data):
@@ -30,93 +33,100 @@ def verify_checksum(seq, checksum, data):
     Args:
         seq: Sequence number
         checksum: Received checksum (bytes)
-        data: Data to verify checksum for (string or bytes)
+        data: Data to verify checksum for (string or bytes-like)
 
     Returns:
         bool: True if checksum is valid, False otherwise
     """
-    data_bytes = data.encode('utf-8') if isinstance(data, str) else data
-    bit_sum = sum(bin(byte).count('1') for byte in data_bytes)
-    expected_checksum = str(bit_sum).zfill(8).encode('utf-8')
-    return checksum == expected_checksum
+    return checksum == create_checksum(seq, data)
 
 
 def main():
-    # Create a UDP socket and set it to non-blocking
+    # Create a UDP socket
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    sock.setblocking(0)
+    # Bind the I/O calls once; sends still go through udt so they can be lost
+    _send = udt.send
+    _recv_into = sock.recvfrom_into
+    # Every receive reuses this buffer
+    _buf = bytearray(udt.BUFSIZE)
+    _mv = memoryview(_buf)
     server_address = ('localhost', 10000)
 
-    # Initialize timer with a timeout value (in seconds)
+    # Timeout value for each ACK wait (in seconds)
     timeout_value = 1.0
     max_retries = 10
-    mytimer = t.Timer(timeout_value)
 
     seq = 0  # Starting sequence number
 
+    # Build all 20 packets up front so a (re)transmission is only a send
+    payloads = [b"Message-%d-Seq-%d" % (i, i % 256) for i in range(20)]
+    pkts = [packet.make(i % 256, create_checksum(i % 256, p), p) for i, p in enumerate(payloads)]
+
+    # The ACK for each sequence number is fixed, so its payload and checksum
+    # are known before anything is received
+    expected_acks = [b"ACK-%d" % s for s in range(256)]
+    expected_ack_ck = [create_checksum(s, m) for s, m in enumerate(expected_acks)]
+
     try:
         # Send 20 messages
         for message_num in range(20):
             retries = 0
             ack_received = False
-            texttosend = f"Message-{message_num}-Seq-{seq}".encode('utf-8')
-            checksum = create_checksum(seq, texttosend)
-            pkt = packet.make(seq, checksum, texttosend)
+            texttosend = payloads[message_num]
+            pkt = pkts[message_num]
 
             # Keep trying until ACK received or max retries reached
             while not ack_received and retries < max_retries:
                 # Send the packet
-                udt.send(pkt, sock, server_address)
-                print(f"Client: Sent packet {seq} with data: {texttosend.decode('utf-8')}")
+                _send(pkt, sock, server_address)
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug("Client: Sent packet %d with data: %s", seq, texttosend.decode('utf-8'))
 
-                # Start the timer and wait for ACK
-                mytimer.start()
+                # Wait for ACK until the deadline
+                deadline = monotonic() + timeout_value
+
+                while monotonic() < deadline:
+                    # Block until the ACK arrives or the deadline passes
+                    ready, _, _ = select.select([sock], [], [], max(0.0, deadline - monotonic()))
+                    if not ready:
+                        break
 
-                while mytimer.running() and not mytimer.timeout():
                     try:
-                        rcvpkt, addr = udt.recv(sock)
+                        nbytes, addr = _recv_into(_buf)
+                        rcvpkt = _mv[:nbytes]
 
                         if rcvpkt:
                             ack_seq, ack_checksum, dataRcvd = packet.extract(rcvpkt)
 
-                            # Verify checksum and sequence number
-                            if verify_checksum(ack_seq, ack_checksum, dataRcvd):
-                                print(f"Client: Received valid ACK: {dataRcvd.decode('utf-8')}")
-
-                                # Check if ACK is for the correct sequence number
-                                if ack_seq == seq:
-                                    print(f"Client: ACK matches sent sequence {seq}")
-                                    ack_received = True
-                                    break
-                                else:
-                                    print(f"Client: Received ACK for wrong sequence, expected {seq}, got {ack_seq}")
+                            # Check sequence number, then compare against the expected ACK
+                            if ack_seq != seq:
+                                log.debug("Client: Received ACK for wrong sequence, expected %d, got %d", seq, ack_seq)
+                            elif ack_checksum == expected_ack_ck[seq] and dataRcvd == expected_acks[seq]:
+                                if log.isEnabledFor(logging.DEBUG):
+                                    log.debug("Client: Received valid ACK: %s", bytes(dataRcvd).decode('utf-8'))
+                                    log.debug("Client: ACK matches sent sequence %d", seq)
+                                ack_received = True
+                                break
                             else:
-                                print(f"Client: Received corrupted ACK, dropping")
-
-                    except BlockingIOError:
-                        # No data available, continue waiting
-                        time.sleep(0.01)
-                    except Exception as e:
-                        print(f"Client: Error receiving: {e}")
+                                log.debug("Client: Received corrupted ACK, dropping")
 
-                # Stop the timer
-                mytimer.stop()
+                    except OSError as e:
+                        log.warning("Client: Error receiving: %s", e)
 
                 # If no ACK received, retransmit
                 if not ack_received:
                     retries += 1
-                    print(f"Client: Timeout for packet {seq}, retrying ({retries}/{max_retries})")
+                    log.info("Client: Timeout for packet %d, retrying (%d/%d)", seq, retries, max_retries)
 
                     # Adaptive timeout - increase timeout value slightly with each retry
                     if retries > 1:
                         timeout_value = min(timeout_value * 1.5, 5.0)
-                        mytimer = t.Timer(timeout_value)
-                        print(f"Client: Increased timeout to {timeout_value:.2f} seconds")
+                        log.info("Client: Increased timeout to %.2f seconds", timeout_value)
 
             # Check if max retries reached without ACK
             if not ack_received:
-                print(f"Client: Failed to receive ACK for packet {seq} after {max_retries} attempts")
-                print("Client: Connection seems unreliable, terminating")
+                log.error("Client: Failed to receive ACK for packet %d after %d attempts", seq, max_retries)
+                log.error("Client: Connection seems unreliable, terminating")
                 break
 
             # Move to next sequence number
@@ -127,7 +137,7 @@ def main():
 
     finally:
         # Send termination message
-        texttosend = "DONE".encode('utf-8')
+        texttosend = b"DONE"
         checksum = create_checksum(seq, texttosend)
         pkt = packet.make(seq, checksum, texttosend)
 
@@ -136,31 +146,37 @@ def main():
         retries = 0
 
         while not done_received and retries < max_retries:
-            udt.send(pkt, sock, server_address)
-            print(f"Client: Sent DONE message with sequence {seq}")
+            _send(pkt, sock, server_address)
+            log.info("Client: Sent DONE message with sequence %d", seq)
 
             # Wait for ACK
-            mytimer.start()
-            while mytimer.running() and not mytimer.timeout():
+            deadline = monotonic() + timeout_value
+            while monotonic() < deadline:
+                ready, _, _ = select.select([sock], [], [], max(0.0, deadline - monotonic()))
+                if not ready:
+                    break
+
+                # select() also reports pending socket errors as readable
                 try:
-                    rcvpkt, addr = udt.recv(sock)
+                    nbytes, addr = _recv_into(_buf)
+                    rcvpkt = _mv[:nbytes]
                     if rcvpkt:
                         ack_seq, ack_checksum, dataRcvd = packet.extract(rcvpkt)
-                        if verify_checksum(ack_seq, ack_checksum, dataRcvd) and ack_seq == seq:
-                            print("Client: Received ACK for DONE message")
+                        if ack_seq == seq and ack_checksum == expected_ack_ck[seq] and dataRcvd == expected_acks[seq]:
+                            log.info("Client: Received ACK for DONE message")
                             done_received = True
                             break
-                except:
-                    time.sleep(0.01)
+                except OSError as e:
+                    log.warning("Client: Error receiving: %s", e)
 
-            mytimer.stop()
             if not done_received:
                 retries += 1
-                print(f"Client: Timeout for DONE message, retrying ({retries}/{max_retries})")
+                log.info("Client: Timeout for DONE message, retrying (%d/%d)", retries, max_retries)
 
-        print("Client: Closing connection")
+        log.info("Client: Closing connection")
         sock.close()
 
 
 if __name__ == "__main__":
+    logging.basicConfig(format="%(message)s", level=logging.INFO)
     main()
\ No newline at end of file
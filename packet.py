@@ -1,9 +1,15 @@
 # packet.py - Packet-related functions
+import struct
+
+# Header layout: 4-byte little-endian signed sequence number, 8-byte checksum
+# '8s' would pad or truncate any other checksum size, so make() rejects those
+_pack_header = struct.Struct('<i8s').pack
 
 # Creates a packet from a sequence number and byte data
 def make(seq_num, checksum, data = b''):
-    seq_bytes = seq_num.to_bytes(4, byteorder = 'little', signed = True)
-    return seq_bytes + checksum + data
+    if len(checksum) != 8:
+        raise ValueError("checksum must be exactly 8 bytes")
+    return _pack_header(seq_num, checksum) + data
 
 # Creates an empty packet
 def make_empty():
@@ -1,26 +1,33 @@
+import logging
 import socket
+import zlib
 import sys
 import udt
+import udt_batch
 import packet
 import timer
 
+log = logging.getLogger(__name__)
+
+# Maximum number of ACKs sent with one sendmmsg call; without MSG_DONTWAIT
+# there is no cheap way to probe for more data, so every ACK is sent at once
+ACK_BATCH_SIZE = 16 if hasattr(socket, 'MSG_DONTWAIT') else 1
+
 
 def create_checksum(seq, data):
-    """Create a checksum for the given data by counting '1' bits.
+    """Create a CRC-32 checksum for the given data.
 
     Args:
         seq: Sequence number
-        data: Data to create checksum for (string or bytes)
+        data: Data to create checksum for (string or bytes-like)
 
     Returns:
         bytes: 8-byte checksum
     """
     # Convert data to bytes if needed
     data_bytes = data.encode('utf-8') if isinstance(data, str) else data
-    bit_sum = sum(bin(byte).count('1') for byte in data_bytes)
-    # Ensure checksum is exactly 8 bytes
-    checksum = str(bit_sum).zfill(8).encode('utf-8')
-    return checksum
+    # Zero-pad the 4-byte CRC so the checksum is exactly 8 bytes
+    return zlib.crc32(data_bytes).to_bytes(8, 'big')
 
 
 def verify_checksum(seq, checksum, data):
@@ -29,73 +36,120 @@ def verify_checksum(seq, checksum, data):
     Args:
         seq: Sequence number
         checksum: Received checksum (bytes)
-        data: Data to verify checksum for (string or bytes)
+        data: Data to verify checksum for (string or bytes-like)
 
     Returns:
         bool: True if checksum is valid, False otherwise
     """
-    data_bytes = data.encode('utf-8') if isinstance(data, str) else data
-    bit_sum = sum(bin(byte).count('1') for byte in data_bytes)
-    expected_checksum = str(bit_sum).zfill(8).encode('utf-8')
-    return checksum == expected_checksum
+    return checksum == create_checksum(seq, data)
+
+
+def make_ack(seq):
+    """Create the ACK packet for a sequence number.
+
+    Args:
+        seq: Sequence number to acknowledge
+
+    Returns:
+        bytes: ACK packet
+    """
+    ack_message = b"ACK-%d" % seq
+    ack_checksum = create_checksum(seq, ack_message)
+    return packet.make(seq, ack_checksum, ack_message)
 
 
 def main():
     # Create a UDP socket
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    # Bind the I/O calls once; sends still go through udt_batch so they can be lost
+    _send_many = udt_batch.send_many
+    _recv_into = sock.recvfrom_into
+    # Every receive reuses this buffer
+    _buf = bytearray(udt.BUFSIZE)
+    _mv = memoryview(_buf)
 
     # Bind the socket to the port
     server_address = ('localhost', 10000)
-    print(f"Server: Starting up on {server_address[0]} port {server_address[1]}")
+    log.info("Server: Starting up on %s port %d", server_address[0], server_address[1])
     sock.bind(server_address)
 
     expected_seq = 0  # Expected sequence number
+    delivered = 0  # Packets delivered in order so far
+
+    # ACKs only depend on the sequence number, so build all 256 up front
+    ack_pkts = [make_ack(s) for s in range(256)]
+    # ACKs waiting to be flushed with a single sendmmsg
+    pending = []
 
     try:
         while True:
-            print(f"Server: Waiting for packet {expected_seq}")
-            pkt, addr = udt.recv(sock)
+            log.debug("Server: Waiting for packet %d", expected_seq)
+            if pending:
+                # Probe with a non-blocking receive; if nothing is waiting,
+                # flush the queued ACKs before blocking
+                try:
+                    nbytes, addr = _recv_into(_buf, 0, socket.MSG_DONTWAIT)
+                except BlockingIOError:
+                    _send_many(pending, sock)
+                    log.debug("Server: Sent %d ACK(s)", len(pending))
+                    pending = []
+                    nbytes, addr = _recv_into(_buf)
+            else:
+                nbytes, addr = _recv_into(_buf)
+            pkt = _mv[:nbytes]
             seq, checksum, dataRcvd = packet.extract(pkt)
 
-            print(f"Server: Received packet with seq={seq}, expected={expected_seq}")
+            log.debug("Server: Received packet with seq=%d, expected=%d", seq, expected_seq)
 
             # Verify checksum
             if verify_checksum(seq, checksum, dataRcvd):
-                print(f"Server: Valid checksum for packet with data: {dataRcvd}")
-
-                # Check if this is the packet we're expecting
-                if seq == expected_seq:
-                    print(f"Server: Received expected packet {seq}")
-                    # Move to next sequence number
-                    expected_seq = (expected_seq + 1) % 256
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug("Server: Valid checksum for packet with data: %s", bytes(dataRcvd))
+
+                # Move to the next sequence number only if this is the packet we're expecting
+                advance = int(seq == expected_seq)
+                delivered += advance
+                expected_seq = (expected_seq + advance) & 0xFF
+                if advance:
+                    log.debug("Server: Received expected packet %d (%d delivered)", seq, delivered)
                 else:
-                    print(f"Server: Duplicate or out-of-order packet, expected {expected_seq}, got {seq}")
+                    log.debug("Server: Duplicate or out-of-order packet, expected %d, got %d", expected_seq, seq)
 
                 # Always ACK the received packet regardless of sequence
-                ack_message = f"ACK-{seq}".encode('utf-8')
-                ack_checksum = create_checksum(seq, ack_message)
+                ack_pkt = ack_pkts[seq] if 0 <= seq < 256 else make_ack(seq)
+                pending.append((ack_pkt, addr))
+                log.debug("Server: Queued ACK for packet %d", seq)
 
-                # Create and send ACK packet
-                ack_pkt = packet.make(seq, ack_checksum, ack_message)
-                udt.send(ack_pkt, sock, addr)
-                print(f"Server: Sent ACK for packet {seq}")
+                # Flush once the batch is full or this is the termination message
+                is_done = dataRcvd == b'DONE'
+                if len(pending) >= ACK_BATCH_SIZE or is_done:
+                    _send_many(pending, sock)
+                    log.debug("Server: Sent %d ACK(s)", len(pending))
+                    pending = []
 
                 # Check if this is the termination message
-                if dataRcvd == b'DONE':
-                    print("Server: Received DONE message, shutting down")
+                if is_done:
+                    log.info("Server: Received DONE message, shutting down")
                     break
 
             else:
-                print(f"Server: Invalid checksum for packet {seq}, dropping packet")
+                log.debug("Server: Invalid checksum for packet %d, dropping packet", seq)
                 # For corrupted packets, we don't send an ACK
 
     except Exception as e:
-        print(f"Server: Error: {e}")
+        log.error("Server: Error: %s", e)
 
     finally:
-        print("Server: Closing socket")
+        # Best-effort flush so an error does not drop ACKs still queued
+        if pending:
+            try:
+                _send_many(pending, sock)
+            except OSError as e:
+                log.error("Server: Error flushing ACKs: %s", e)
+        log.info("Server: Closing socket")
         sock.close()
 
 
 if __name__ == "__main__":
+    logging.basicConfig(format="%(message)s", level=logging.INFO)
     main()
\ No newline at end of file
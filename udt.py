@@ -2,6 +2,7 @@
 import random
 DROP_PROB = .01
 CORR_PROB = .01
+BUFSIZE = 1024
 
 # Send a packet across the unreliable channel
 # Packet may be lost or corrupted
@@ -12,5 +13,5 @@ def send(packet, sock, addr):
 
 # Receive a packet from the unreliable channel
 def recv(sock):
-    packet, addr = sock.recvfrom(1024)
+    packet, addr = sock.recvfrom(BUFSIZE)
     return packet, addr
\ No newline at end of file
@@ -0,0 +1,100 @@
+# udt_batch.py - Batched sends over the unreliable channel using sendmmsg(2)
+import ctypes
+import ctypes.util
+import os
+import random
+import socket
+import udt
+
+
+class iovec(ctypes.Structure):
+    _fields_ = [('iov_base', ctypes.c_void_p),
+                ('iov_len', ctypes.c_size_t)]
+
+
+class msghdr(ctypes.Structure):
+    _fields_ = [('msg_name', ctypes.c_void_p),
+                ('msg_namelen', ctypes.c_uint32),
+                ('msg_iov', ctypes.POINTER(iovec)),
+                ('msg_iovlen', ctypes.c_size_t),
+                ('msg_control', ctypes.c_void_p),
+                ('msg_controllen', ctypes.c_size_t),
+                ('msg_flags', ctypes.c_int)]
+
+
+class mmsghdr(ctypes.Structure):
+    _fields_ = [('msg_hdr', msghdr),
+                ('msg_len', ctypes.c_uint)]
+
+
+class sockaddr_in(ctypes.Structure):
+    _fields_ = [('sin_family', ctypes.c_ushort),
+                ('sin_port', ctypes.c_uint16),
+                ('sin_addr', ctypes.c_uint8 * 4),
+                ('sin_zero', ctypes.c_uint8 * 8)]
+
+
+# sendmmsg is Linux-only; elsewhere send_batch falls back to one sendto per packet
+try:
+    libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    _sendmmsg = libc.sendmmsg
+    _sendmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(mmsghdr), ctypes.c_uint, ctypes.c_uint]
+    _sendmmsg.restype = ctypes.c_int
+except (OSError, AttributeError):
+    _sendmmsg = None
+
+# Builds a sockaddr_in for an IPv4 (host, port) address
+def _make_sockaddr(addr):
+    host, port = addr
+    sa = sockaddr_in()
+    sa.sin_family = socket.AF_INET
+    sa.sin_port = socket.htons(port)
+    sa.sin_addr[:] = socket.inet_aton(socket.gethostbyname(host))
+    return sa
+
+# Send a list of packets to addr with as few syscalls as possible
+# Like udt.send, each packet may be lost
+def send_batch(packets, sock, addr):
+    send_many([(p, addr) for p in packets], sock)
+    return
+
+# Send a list of (packet, addr) pairs with as few syscalls as possible
+# Like udt.send, each packet may be lost
+def send_many(pending, sock):
+    pending = [(p, addr) for p, addr in pending if random.randint(0, 10) > udt.DROP_PROB]
+    if not pending:
+        return
+
+    # A single packet is cheaper as a plain sendto than through the ctypes setup
+    if len(pending) == 1 or _sendmmsg is None or sock.family != socket.AF_INET:
+        for p, addr in pending:
+            sock.sendto(p, addr)
+        return
+
+    count = len(pending)
+    # Keep the buffers and addresses referenced until sendmmsg returns
+    addrs = {}
+    bufs = [ctypes.create_string_buffer(p, len(p)) for p, _ in pending]
+    iovs = (iovec * count)()
+    msgs = (mmsghdr * count)()
+    for i, (p, addr) in enumerate(pending):
+        sa = addrs.get(addr)
+        if sa is None:
+            sa = addrs[addr] = _make_sockaddr(addr)
+        iovs[i].iov_base = ctypes.cast(bufs[i], ctypes.c_void_p)
+        iovs[i].iov_len = len(p)
+        hdr = msgs[i].msg_hdr
+        hdr.msg_name = ctypes.cast(ctypes.pointer(sa), ctypes.c_void_p)
+        hdr.msg_namelen = ctypes.sizeof(sa)
+        hdr.msg_iov = ctypes.pointer(iovs[i])
+        hdr.msg_iovlen = 1
+
+    # sendmmsg may send fewer messages than asked, so resubmit the rest
+    sent = 0
+    while sent < count:
+        n = _sendmmsg(sock.fileno(), ctypes.pointer(msgs[sent]), count - sent, 0)
+        if n < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        sent += n
+    return